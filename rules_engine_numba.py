@@ -0,0 +1,105 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Sem numba instalado, o decorador torna-se um passthrough: o kernel
+        # continua correto, apenas sem compilação nativa.
+        def decorador(func):
+            return func
+        if args and callable(args[0]):
+            return args[0]
+        return decorador
+
+# Variáveis numéricas suportadas pelo kernel, por índice.
+VARIAVEIS_NUMERICAS = ('temp', 'hum', 'wind')
+
+# Codificação dos operadores textuais em inteiros para o kernel.
+OP_CODES = {'>': 0, '<': 1, '==': 2, '!=': 3, '>=': 4, '<=': 5}
+
+
+def empacotar_regras(regras):
+    """Converte a lista de regras JSON em arrays NumPy para o kernel.
+
+    Devolve None se alguma regra usar uma variável não numérica (por ex.
+    'event_type') ou um operador desconhecido — nesse caso o motor deve
+    usar o caminho vetorizado normal.
+    """
+    op_codes, var_idx, thresholds = [], [], []
+    rule_start, rule_len = [], []
+
+    for regra in regras:
+        rule_start.append(len(op_codes))
+        rule_len.append(len(regra['condicoes']))
+        for condicao in regra['condicoes']:
+            if condicao['variavel'] not in VARIAVEIS_NUMERICAS:
+                return None
+            if condicao['operador'] not in OP_CODES:
+                return None
+            if not isinstance(condicao['valor'], (int, float)):
+                return None
+            op_codes.append(OP_CODES[condicao['operador']])
+            var_idx.append(VARIAVEIS_NUMERICAS.index(condicao['variavel']))
+            thresholds.append(float(condicao['valor']))
+
+    return (
+        np.array(op_codes, dtype=np.int64),
+        np.array(var_idx, dtype=np.int64),
+        np.array(thresholds, dtype=np.float64),
+        np.array(rule_start, dtype=np.int64),
+        np.array(rule_len, dtype=np.int64),
+    )
+
+
+@njit(cache=True, parallel=True)
+def eval_rules(temp, hum, wind, op_codes, var_idx, thresholds, rule_start, rule_len):
+    """Avalia todas as regras numéricas num único passe nativo sobre as colunas.
+
+    As regras vêm já ordenadas por prioridade; para cada linha devolve o
+    índice da primeira regra satisfeita, ou -1 se nenhuma se aplicar.
+    As linhas são independentes entre si, pelo que o loop exterior é
+    distribuído pelos núcleos com prange — cada thread escreve apenas na
+    sua posição de 'resultado', sem necessidade de sincronização.
+    """
+    n = temp.shape[0]
+    resultado = np.full(n, -1, dtype=np.int64)
+    for i in prange(n):
+        for r in range(rule_start.shape[0]):
+            cumprida = True
+            for k in range(rule_start[r], rule_start[r] + rule_len[r]):
+                v = var_idx[k]
+                if v == 0:
+                    valor = temp[i]
+                elif v == 1:
+                    valor = hum[i]
+                else:
+                    valor = wind[i]
+
+                c = op_codes[k]
+                t = thresholds[k]
+                if c == 0:
+                    ok = valor > t
+                elif c == 1:
+                    ok = valor < t
+                elif c == 2:
+                    ok = valor == t
+                elif c == 3:
+                    ok = valor != t
+                elif c == 4:
+                    ok = valor >= t
+                else:
+                    ok = valor <= t
+
+                if not ok:
+                    cumprida = False
+                    break
+
+            if cumprida:
+                resultado[i] = r
+                break
+    return resultado